@@ -1,17 +1,13 @@
 
-import argparse
 import os
 import sys
+import time
 from pathlib import Path
-from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator
 
 from . import viopi_utils
 from . import viopi_ignorer
 from . import viopi_printer
-from . import viopi_json_output
-from . import viopi_minifier
-from .viopi_help import print_help_and_exit
-from .viopi_version import get_project_version, print_version_and_exit
 
 OUTPUT_BASENAME = "_viopi_output"
 OUTPUT_EXTENSION = ".viopi"
@@ -19,46 +15,203 @@ APPEND_FILENAME = f"{OUTPUT_BASENAME}{OUTPUT_EXTENSION}"
 HUGE_FILE_THRESHOLD_BYTES = 100 * 1024  # 100 KiB
 
 def get_next_versioned_filename(base: str, ext: str, directory: str) -> str:
-    version = 1
-    while True:
-        filename = Path(directory) / f"{base}_{version}{ext}"
-        if not filename.exists():
-            return str(filename)
-        version += 1
+    """
+    Returns the path for the next versioned output file in `directory`.
+    A single directory scan finds the highest existing version, instead of
+    probing each candidate name with a separate stat.
+    """
+    prefix = f"{base}_"
+    highest = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith(prefix) and name.endswith(ext):
+                version = name[len(prefix):len(name) - len(ext)]
+                if version.isascii() and version.isdigit() and int(version) > highest:
+                    highest = int(version)
+    return os.path.join(directory, f"{base}_{highest + 1}{ext}")
+
+# A mapping of file extensions to markdown language identifiers
+_EXT_MAP = {
+    # Web
+    ".html": "html", ".css": "css", ".scss": "scss",
+    ".js": "javascript", ".jsx": "jsx",
+    ".ts": "typescript", ".tsx": "tsx",
+    # Python
+    ".py": "python",
+    # Mobile
+    ".swift": "swift", ".kt": "kotlin", ".kts": "kotlin",
+    ".java": "java", ".m": "objectivec",
+    # C-family
+    ".c": "c", ".h": "c", ".cpp": "cpp", ".hpp": "cpp", ".cs": "csharp",
+    # Backend
+    ".go": "go", ".rs": "rust", ".rb": "ruby", ".php": "php",
+    # Scripting & Shell
+    ".sh": "shell", ".bash": "bash", ".zsh": "zsh", ".ps1": "powershell",
+    ".pl": "perl", ".lua": "lua",
+    # Data & Config
+    ".json": "json", ".xml": "xml", ".yaml": "yaml", ".yml": "yaml",
+    ".md": "markdown", ".sql": "sql",
+    # Other
+    ".r": "r", ".dockerfile": "dockerfile", "Dockerfile": "dockerfile",
+}
 
 def get_language_from_filename(filename: str) -> str:
     """Guess the markdown language tag from a filename."""
-    # A mapping of file extensions to markdown language identifiers
-    ext_map = {
-        # Web
-        ".html": "html", ".css": "css", ".scss": "scss",
-        ".js": "javascript", ".jsx": "jsx",
-        ".ts": "typescript", ".tsx": "tsx",
-        # Python
-        ".py": "python",
-        # Mobile
-        ".swift": "swift", ".kt": "kotlin", ".kts": "kotlin",
-        ".java": "java", ".m": "objectivec",
-        # C-family
-        ".c": "c", ".h": "c", ".cpp": "cpp", ".hpp": "cpp", ".cs": "csharp",
-        # Backend
-        ".go": "go", ".rs": "rust", ".rb": "ruby", ".php": "php",
-        # Scripting & Shell
-        ".sh": "shell", ".bash": "bash", ".zsh": "zsh", ".ps1": "powershell",
-        ".pl": "perl", ".lua": "lua",
-        # Data & Config
-        ".json": "json", ".xml": "xml", ".yaml": "yaml", ".yml": "yaml",
-        ".md": "markdown", ".sql": "sql",
-        # Other
-        ".r": "r", ".dockerfile": "dockerfile", "Dockerfile": "dockerfile",
-    }
     # Handle files with no extension like 'Dockerfile'
-    name = Path(filename).name
-    if name in ext_map:
-        return ext_map[name]
+    name = os.path.basename(filename)
+    if name in _EXT_MAP:
+        return _EXT_MAP[name]
+
+    suffix = os.path.splitext(name)[1].lower()
+    return _EXT_MAP.get(suffix, "") # Return empty string if not found
+
+def iter_text_output(header: str, tree_output: str, file_data_list: Iterable[dict],
+                     line_numbers: bool = False, code_fences: bool = True) -> Iterator[str]:
+    """
+    Yields the formatted text output piece by piece so callers can stream it
+    to a file or stdout without building the whole payload in memory.
+    """
+    yield header
+    yield tree_output
+    yield "\n\n---\nCombined file contents:"
+    for file_data in file_data_list:
+        yield f"\n\n--- FILE: {file_data['path']} ---"
+
+        content_to_print = file_data['content']
+        if line_numbers:
+            lines = content_to_print.split('\n')
+            max_line_num = len(lines)
+            if max_line_num > 0:
+                # Right-align line numbers for clean formatting
+                padding = len(str(max_line_num))
+                # Build the format string once and join everything in a single
+                # pass instead of parsing a nested f-string spec per line.
+                number_line = f"{{:>{padding}}}: {{}}".format
+                content_to_print = "\n".join(map(number_line, range(1, max_line_num + 1), lines))
+
+        if code_fences:
+            lang = get_language_from_filename(file_data['path'])
+            yield f"\n```{lang}\n"
+            yield content_to_print
+            yield "\n```"
+        else:
+            yield "\n"
+            yield content_to_print
+    yield "\n\n--- End of context ---"
+
+# Starting the process pool has a fixed cost (see iter_minified), so small
+# runs minify inline. The cutoff is a rough threshold, not a measured crossover.
+MINIFY_POOL_MIN_FILES = 8
+
+# ProcessPoolExecutor refuses more workers than this on Windows.
+_MAX_WINDOWS_WORKERS = 61
+
+def _minified_result(content, error, future) -> tuple:
+    """Turns a pending minify job into (content, error, chars_saved)."""
+    if error is not None:
+        return None, error, 0
+    minified = future.result()
+    return minified, None, max(0, len(content) - len(minified))
+
+def iter_minified(files_to_process_tuples: list, read_results: Iterable[tuple]) -> Iterator[tuple]:
+    """
+    Minifies each successfully read file, yielding (content, error, chars_saved)
+    in order. Minifying is CPU-bound, so larger sets of files are handed to a
+    process pool rather than run one by one on the main thread.
+    """
+    # Only --minify needs the minifier and its parsers.
+    from . import viopi_minifier
+
+    workers = min(os.cpu_count() or 1, len(files_to_process_tuples), _MAX_WINDOWS_WORKERS)
+    if workers == 1 or len(files_to_process_tuples) <= MINIFY_POOL_MIN_FILES:
+        for (_, logical_path, _, _), (content, error) in zip(files_to_process_tuples, read_results):
+            if error is not None:
+                yield None, error, 0
+                continue
+            minified = viopi_minifier.minify_content(content, logical_path)
+            yield minified, None, max(0, len(content) - len(minified))
+        return
+
+    import multiprocessing
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    # The reads run on iter_map_files' threads, and forking a threaded process
+    # can deadlock, so workers start from a fresh process instead. Unlike fork,
+    # these start methods also let the pool start workers only as needed.
+    # Starting a forkserver pool took about 75-150 ms here (fork: ~10 ms).
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    mp_context = multiprocessing.get_context(start_method)
+
+    # Like iter_map_files, only a bounded window of files is read ahead and in
+    # flight; contents keep streaming instead of all being held at once.
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        pending = deque()
+        for (_, logical_path, _, _), (content, error) in zip(files_to_process_tuples, read_results):
+            if len(pending) >= max_pending:
+                yield _minified_result(*pending.popleft())
+            if error is not None:
+                pending.append((None, error, None))
+            else:
+                future = pool.submit(viopi_minifier.minify_content, content, logical_path)
+                pending.append((content, None, future))
+        while pending:
+            yield _minified_result(*pending.popleft())
+
+def iter_file_data(files_to_process_tuples: list, stats: dict, minify: bool = False) -> Iterator[dict]:
+    """
+    Reads the files to process and yields {"path", "content"} dicts in order,
+    updating `stats` as each file is yielded. Reads run concurrently a bounded
+    number of files ahead of the consumer.
+    """
+    # The walker already sized each file, so reads can skip their own fstat.
+    sizes = {t[0]: t[3] for t in files_to_process_tuples}
+    read_results = viopi_utils.iter_map_files(
+        lambda path: viopi_utils.read_text_file(path, size_hint=sizes[path]),
+        [t[0] for t in files_to_process_tuples],
+    )
+    if minify:
+        results = iter_minified(files_to_process_tuples, read_results)
+    else:
+        results = ((content, error, 0) for content, error in read_results)
+
+    for (physical_path, logical_path, _, _), (content, error, chars_saved) in zip(files_to_process_tuples, results):
+        if error is not None:
+            viopi_printer.print_warning(f"Could not read file {physical_path}: {error}")
+            continue
 
-    suffix = Path(filename).suffix.lower()
-    return ext_map.get(suffix, "") # Return empty string if not found
+        stats["total_chars_saved_minify"] += chars_saved
+        stats["total_files"] += 1
+        stats["total_lines"] += viopi_utils.count_lines(content)
+        stats["total_characters"] += len(content)
+        yield {"path": logical_path, "content": content}
+
+# Output files are written through a large buffer so the many small header
+# pieces between file contents coalesce into few write() calls.
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+def write_chunks(out: BinaryIO, chunks: Iterable[str]) -> int:
+    """
+    Encodes each chunk to UTF-8 once, writes it to the binary stream `out`,
+    and returns the size of everything written.
+    """
+    total_bytes = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        out.write(data)
+        total_bytes += len(data)
+    return total_bytes
+
+def get_ignore_rel_prefix(target_dir_path: Path, ignore_root: Path) -> str:
+    """
+    Returns the string that turns a path relative to the target directory into
+    one relative to ignore_root: '' or the target dir's relative path plus a
+    separator.
+    """
+    rel = target_dir_path.relative_to(ignore_root)
+    return "" if str(rel) == "." else str(rel) + os.sep
 
 def handle_suggest_ignore(files_to_scan_tuples, target_dir_path: Path, ignore_root: Path):
     """
@@ -67,22 +220,36 @@ def handle_suggest_ignore(files_to_scan_tuples, target_dir_path: Path, ignore_ro
     large_files = []
     binary_files = []
 
-    for physical_path_str, logical_path_str, _ in files_to_scan_tuples:
+    # One open per file yields both the size and the leading bytes for the
+    # binary check; the sniffs run concurrently.
+    # Sizes the walker already has spare known-extension files any syscall.
+    known_sizes = {t[0]: t[3] for t in files_to_scan_tuples if t[3] is not None}
+    sniff_results = viopi_utils.map_files(
+        lambda path: viopi_utils.sniff_file(path, size=known_sizes.get(path)),
+        [t[0] for t in files_to_scan_tuples]
+    )
+
+    # Paths for the ignore file are relative to ignore_root; logical paths are
+    # relative to the target dir, so one prefix string converts between them.
+    ignore_prefix = get_ignore_rel_prefix(target_dir_path, ignore_root)
+
+    for (physical_path_str, logical_path_str, _, _), (sniffed, error) in zip(files_to_scan_tuples, sniff_results):
         try:
-            file_path = Path(physical_path_str)
+            if error is not None:
+                raise error
+            file_size, is_binary = sniffed
 
             # The path for ignore file should be relative to ignore_root
-            rel_path_to_ignore = (target_dir_path / logical_path_str).relative_to(ignore_root)
+            rel_path_to_ignore = ignore_prefix + logical_path_str
 
             # Check if binary first.
-            if viopi_utils.is_binary_file(physical_path_str):
-                binary_files.append(str(rel_path_to_ignore))
+            if is_binary:
+                binary_files.append(rel_path_to_ignore)
                 continue
 
             # If not binary, check if it's huge.
-            file_size = file_path.stat().st_size
             if file_size > HUGE_FILE_THRESHOLD_BYTES:
-                large_files.append((str(rel_path_to_ignore), file_size))
+                large_files.append((rel_path_to_ignore, file_size))
 
         except (FileNotFoundError, Exception) as e:
             viopi_printer.print_warning(f"Could not process {physical_path_str}: {e}. Skipping.")
@@ -91,25 +258,57 @@ def handle_suggest_ignore(files_to_scan_tuples, target_dir_path: Path, ignore_ro
         viopi_printer.print_info("No binary or large files found to suggest for ignoring.")
         return
 
-    # Print to stdout, as this is the primary output of this mode
-    print("# Viopi: Suggested ignores for binary or large files.")
-    print("# Add these lines to your .viopi_ignore file to exclude them.\n")
+    # Print to stdout, as this is the primary output of this mode. The listing
+    # is collected first and written in one go.
+    lines = [
+        "# Viopi: Suggested ignores for binary or large files.",
+        "# Add these lines to your .viopi_ignore file to exclude them.\n",
+    ]
 
+    # The lists are built here and not needed unsorted, so sort in place.
     if binary_files:
-        print("# --- Binary Files ---")
-        for path in sorted(binary_files):
-            print(path)
-        print("")
+        binary_files.sort()
+        lines.append("# --- Binary Files ---")
+        lines.extend(binary_files)
+        lines.append("")
 
     if large_files:
-        print(f"# --- Large Files (over {HUGE_FILE_THRESHOLD_BYTES // 1024} KiB) ---")
-        for path, size in sorted(large_files):
+        large_files.sort()
+        lines.append(f"# --- Large Files (over {HUGE_FILE_THRESHOLD_BYTES // 1024} KiB) ---")
+        for path, size in large_files:
             size_str = viopi_utils.format_bytes(size)
-            print(f"{path} # {size_str}")
-        print("")
+            lines.append(f"{path} # {size_str}")
+        lines.append("")
+
+    sys.stdout.write("\n".join(lines) + "\n")
+
+# Help and version are only imported when asked for; normal runs skip them
+# (and the hashlib/json imports of the version module).
+def show_help():
+    """Prints the help message and exits."""
+    from .viopi_help import print_help_and_exit
+    from .viopi_version import get_project_version
+    version = get_project_version()
+    print_help_and_exit(version, OUTPUT_BASENAME, OUTPUT_EXTENSION, APPEND_FILENAME)
+
+def show_version():
+    """Prints the version and exits."""
+    from .viopi_version import print_version_and_exit
+    print_version_and_exit()
 
 def main():
     """Main function to run the viopi tool."""
+    # A lone -h/-v doesn't need the argument parser at all.
+    if len(sys.argv) == 2:
+        if sys.argv[1] in ("-h", "--help"):
+            show_help()
+        if sys.argv[1] in ("-v", "--version"):
+            show_version()
+
+    # Imported here so the fast path above never loads it; none of the
+    # modules imported at the top pull it in either.
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Viopi: A tool for preparing project context for LLMs.",
         add_help=False
@@ -133,6 +332,8 @@ def main():
     parser.add_argument("--minify", action="store_true",
                         help="Minify code files (JS, CSS, Python, HTML, JSON) to reduce token count.")
     parser.add_argument("--no-follow-links", action="store_true")
+    parser.add_argument("--git", action="store_true",
+    help="List files with 'git ls-files' (honours .gitignore) instead of walking the directory.")
     parser.add_argument("--show-ignore", action="store_true",
     help="Print the combined .viopi_ignore patterns (with sources) and exit.")
     parser.add_argument("--show-all", action="store_true",
@@ -149,23 +350,29 @@ def main():
     if args.stdout:
         viopi_printer.configure(silent=True)
 
-    version = get_project_version()
-
     if args.help:
-        print_help_and_exit(version, OUTPUT_BASENAME, OUTPUT_EXTENSION, APPEND_FILENAME)
+        show_help()
     if args.version:
-        print_version_and_exit()
+        show_version()
 
     target_dir_str = "."
+    target_is_dir = False
     patterns = []
     if args.path_and_patterns:
-        if os.path.isdir(args.path_and_patterns[0]):
-            target_dir_str = args.path_and_patterns[0]
+        # A glob or a negation can't be the target directory; skip the stat.
+        # '[' is not treated as a glob here since route-style directory names
+        # like "[id]" are common.
+        first_arg = args.path_and_patterns[0]
+        looks_like_pattern = "*" in first_arg or "?" in first_arg or first_arg.startswith("!")
+        if not looks_like_pattern and os.path.isdir(first_arg):
+            target_dir_str = first_arg
+            target_is_dir = True
             patterns = args.path_and_patterns[1:]
         else:
             patterns = args.path_and_patterns
     target_dir = os.path.abspath(target_dir_str)
-    if not os.path.isdir(target_dir):
+    # A directory argument was just stat'ed; only the default "." is unchecked.
+    if not target_is_dir and not os.path.isdir(target_dir):
         viopi_printer.print_error(f"Directory not found at '{target_dir}'")
 
     if args.show_ignore:
@@ -176,9 +383,16 @@ def main():
     ignore_spec, ignore_root = viopi_ignorer.get_ignore_config(target_dir)
     follow_links = not args.no_follow_links
 
-    files_to_process_tuples, ignored_files_tuples = viopi_utils.get_file_list(
-        target_dir, patterns, follow_links, ignore_spec, ignore_root
-    )
+    file_lists = None
+    if args.git:
+        file_lists = viopi_utils.get_git_file_list(target_dir, patterns, ignore_spec, ignore_root)
+        if file_lists is None:
+            viopi_printer.print_warning("Not inside a git work tree (or git not found); walking the directory instead.")
+    if file_lists is None:
+        file_lists = viopi_utils.get_file_list(
+            target_dir, patterns, follow_links, ignore_spec, ignore_root
+        )
+    files_to_process_tuples, ignored_files_tuples = file_lists
     ignored_count = len(ignored_files_tuples)
 
     # --- SUGGEST IGNORE FLAG ---
@@ -189,33 +403,34 @@ def main():
 
 
     if args.summary:
-        print(f"Directory Processed: {target_dir}")
-        print("--- Files that will be included ---")
-        for _, logical_path, is_symlink in files_to_process_tuples:
+        lines = [f"Directory Processed: {target_dir}", "--- Files that will be included ---"]
+        for _, logical_path, is_symlink, _ in files_to_process_tuples:
             line = logical_path
             if is_symlink:
                 line += " -> [symbolic link]"
-            print(line)
-        print(f"\nTotal files to be included: {len(files_to_process_tuples)}")
-        print(f"Total files ignored (by rules or patterns): {ignored_count}")
+            lines.append(line)
+        lines.append(f"\nTotal files to be included: {len(files_to_process_tuples)}")
+        lines.append(f"Total files ignored (by rules or patterns): {ignored_count}")
+        sys.stdout.write("\n".join(lines) + "\n")
         sys.exit(0)
 
     final_files_to_process_tuples = []
     newly_ignored_paths = []
+    ignore_prefix = get_ignore_rel_prefix(Path(target_dir), ignore_root)
     if files_to_process_tuples:
         for file_tuple in files_to_process_tuples:
-            physical_path_str, logical_path_str, is_symlink = file_tuple
+            physical_path_str, logical_path_str, is_symlink, file_size = file_tuple
             try:
-                # Use the physical path for stat, but the logical path for display/ignore
-                file_path = Path(physical_path_str)
-                file_size = file_path.stat().st_size
+                # The walker already sized the file; only re-stat if that failed,
+                # which raises the error reported below.
+                if file_size is None:
+                    file_size = os.stat(physical_path_str).st_size
 
                 if file_size > HUGE_FILE_THRESHOLD_BYTES:
                     # Show the user the logical path for context
                     logical_path_for_prompt = Path(logical_path_str)
                     if viopi_printer.prompt_to_ignore_huge_file(logical_path_for_prompt, file_size):
-                        rel_path_to_ignore = Path(target_dir) / logical_path_str
-                        newly_ignored_paths.append(str(rel_path_to_ignore.relative_to(ignore_root)))
+                        newly_ignored_paths.append(ignore_prefix + logical_path_str)
                         # Add to ignored list for --show-all and increment count
                         ignored_files_tuples.append(file_tuple)
                         ignored_count += 1
@@ -229,12 +444,13 @@ def main():
                 ignored_count += 1
 
     if newly_ignored_paths:
-        ignore_file_path = Path(target_dir) / viopi_ignorer.REPO_IGNORE_FILENAME
+        ignore_file_path = os.path.join(target_dir, viopi_ignorer.REPO_IGNORE_FILENAME)
         try:
+            # Build the whole block first so it lands in a single write.
+            newly_ignored_paths.sort()
+            block = "\n# Added by viopi (huge file prompt)\n" + "".join(f"{p}\n" for p in newly_ignored_paths)
             with open(ignore_file_path, 'a', encoding='utf-8') as f:
-                f.write("\n# Added by viopi (huge file prompt)\n")
-                for path_to_ignore in sorted(newly_ignored_paths):
-                    f.write(f"{path_to_ignore}\n")
+                f.write(block)
             viopi_printer.print_info(f"Added {len(newly_ignored_paths)} entr(y/ies) to {ignore_file_path}")
         except IOError as e:
             viopi_printer.print_error(f"Could not write to {ignore_file_path}: {e}", is_fatal=False)
@@ -246,72 +462,50 @@ def main():
         sys.exit(0)
 
     stats = { "total_files": 0, "total_lines": 0, "total_characters": 0, "files_ignored": ignored_count, "total_chars_saved_minify": 0 }
-    file_data_list = []
-    for physical_path, logical_path, _ in files_to_process_tuples:
-        try:
-            with open(physical_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            if args.minify:
-                original_len = len(content)
-                minified_content = viopi_minifier.minify_content(content, logical_path)
-                if len(minified_content) < original_len:
-                    chars_saved = original_len - len(minified_content)
-                    stats["total_chars_saved_minify"] += chars_saved
-                content = minified_content
-
-            stats["total_files"] += 1
-            stats["total_lines"] += len(content.splitlines())
-            stats["total_characters"] += len(content)
-            file_data_list.append({"path": logical_path, "content": content})
-        except IOError as e:
-            viopi_printer.print_warning(f"Could not read file {physical_path}: {e}")
+    # Files are read lazily as the output is produced; text output streams
+    # them straight to its destination, only JSON needs them all at once.
+    file_data = iter_file_data(files_to_process_tuples, stats, minify=args.minify)
 
     if args.json:
-        json_string = viopi_json_output.generate_json_output(stats, file_data_list)
-        stats["payload_size_bytes"] = len(json_string.encode('utf-8'))
-        output_string = viopi_json_output.generate_json_output(stats, file_data_list)
-        print(output_string)
+        from . import viopi_json_output
+        file_data_list = list(file_data)
+        # Serialized once; the payload size is spliced into the stats afterwards.
+        output_bytes, payload_size = viopi_json_output.generate_json_output_with_payload_size(stats, file_data_list)
+        stats["payload_size_bytes"] = payload_size
+        # The JSON is already UTF-8; write it to the byte stream as is.
+        sys.stdout.flush()
+        sys.stdout.buffer.write(output_bytes)
+        sys.stdout.buffer.write(b"\n")
+        sys.stdout.buffer.flush()
     else:
         header = f"Directory Processed: {target_dir}\n"
 
         tree_items = []
         if args.show_all:
-            processed_for_tree = [(lp, sl, False) for _, lp, sl in files_to_process_tuples]
-            ignored_for_tree = [(lp, sl, True) for _, lp, sl in ignored_files_tuples]
+            processed_for_tree = [(lp, sl, False) for _, lp, sl, _ in files_to_process_tuples]
+            ignored_for_tree = [(lp, sl, True) for _, lp, sl, _ in ignored_files_tuples]
             tree_items.extend(processed_for_tree)
             tree_items.extend(ignored_for_tree)
         else:
-            tree_items = [(lp, sl, False) for _, lp, sl in files_to_process_tuples]
+            tree_items = [(lp, sl, False) for _, lp, sl, _ in files_to_process_tuples]
 
         tree_output = viopi_utils.generate_tree_output(tree_items)
 
-        file_contents_str = "\n\n---\nCombined file contents:"
-        for file_data in file_data_list:
-            file_contents_str += f"\n\n--- FILE: {file_data['path']} ---"
-
-            content_to_print = file_data['content']
-            if args.line_numbers:
-                lines = content_to_print.split('\n')
-                max_line_num = len(lines)
-                if max_line_num > 0:
-                    # Right-align line numbers for clean formatting
-                    padding = len(str(max_line_num))
-                    numbered_lines = [f"{str(i+1).rjust(padding)}: {line}" for i, line in enumerate(lines)]
-                    content_to_print = "\n".join(numbered_lines)
-
-            if not args.no_code_fences:
-                lang = get_language_from_filename(file_data['path'])
-                file_contents_str += f"\n```{lang}\n{content_to_print}\n```"
-            else:
-                file_contents_str += f"\n{content_to_print}"
-
-        text_output_string = header + tree_output + file_contents_str + "\n\n--- End of context ---"
-        stats["payload_size_bytes"] = len(text_output_string.encode('utf-8'))
+        chunks = iter_text_output(header, tree_output, file_data,
+                                  line_numbers=args.line_numbers,
+                                  code_fences=not args.no_code_fences)
 
         if args.stdout:
-            print(text_output_string)
+            # Write UTF-8 straight to the underlying byte stream, after
+            # anything already buffered on the text layer.
+            sys.stdout.flush()
+            stats["payload_size_bytes"] = write_chunks(sys.stdout.buffer, chunks)
+            sys.stdout.buffer.write(b"\n")
+            sys.stdout.buffer.flush()
         elif args.copy:
+            # pyperclip needs the whole payload as one string.
+            text_output_string = "".join(chunks)
+            stats["payload_size_bytes"] = viopi_utils.utf8_size(text_output_string)
             try:
                 import pyperclip
                 pyperclip.copy(text_output_string)
@@ -319,19 +513,23 @@ def main():
             except (ImportError, pyperclip.PyperclipException) as e:
                 viopi_printer.print_error(f"Could not copy to clipboard. {e}")
         elif args.append:
-            append_path = Path(target_dir) / APPEND_FILENAME
+            append_path = os.path.join(target_dir, APPEND_FILENAME)
             try:
-                with open(append_path, 'a', encoding='utf-8') as f:
-                    f.write(f"\n\n--- Appended on {datetime.now().isoformat()} ---\n")
-                    f.write(text_output_string)
-                viopi_printer.print_success_append(stats, str(append_path))
+                with open(append_path, 'ab', buffering=OUTPUT_BUFFER_SIZE) as f:
+                    # Append mode is O_APPEND and opens positioned at the end, so
+                    # tell() gives the current size without a separate stat.
+                    # Only separate from earlier runs if there is earlier content.
+                    separator = "\n\n" if f.tell() > 0 else ""
+                    f.write(f"{separator}--- Appended on {time.strftime('%Y-%m-%dT%H:%M:%S')} ---\n".encode('utf-8'))
+                    stats["payload_size_bytes"] = write_chunks(f, chunks)
+                viopi_printer.print_success_append(stats, append_path)
             except IOError as e:
                 viopi_printer.print_error(f"Could not append to file {append_path}: {e}")
         else:
             output_filename = get_next_versioned_filename(OUTPUT_BASENAME, OUTPUT_EXTENSION, target_dir)
             try:
-                with open(output_filename, 'w', encoding='utf-8') as f:
-                    f.write(text_output_string)
+                with open(output_filename, 'wb', buffering=OUTPUT_BUFFER_SIZE) as f:
+                    stats["payload_size_bytes"] = write_chunks(f, chunks)
                 viopi_printer.print_success_file(stats, output_filename)
             except IOError as e:
                 viopi_printer.print_error(f"Could not write to file {output_filename}: {e}")
@@ -42,6 +42,9 @@ Options:
 
   --no-follow-links     Disable following symbolic links.
 
+  --git                 List files with 'git ls-files' instead of walking the directory.
+                        Faster on large repositories; also honours .gitignore.
+
 Examples:
   # Process current directory, save to a new versioned file (e.g., _viopi_output_1.viopi)
   viopi
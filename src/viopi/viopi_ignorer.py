@@ -6,13 +6,17 @@ Provides optional annotated / colored output of the combined ignore spec.
                                                                                                                     
 from __future__ import annotations                                                                                
                                                                                                                     
-import argparse                                                                                                   
+import os                                                                                                         
+import re                                                                                                         
+import stat                                                                                                       
 import sys                                                                                                        
 from dataclasses import dataclass                                                                                 
+from functools import lru_cache                                                                                   
 from pathlib import Path                                                                                          
-from typing import List, Tuple                                                                                    
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Tuple                                                 
                                                                                                                     
-import pathspec                                                                                                   
+if TYPE_CHECKING:                                                                                                 
+    import pathspec                                                                                               
                                                                                                                     
 # Default patterns to always ignore                                                                               
 DEFAULT_IGNORE_PATTERNS = [                                                                                       
@@ -29,6 +33,13 @@ DEFAULT_IGNORE_PATTERNS = [
 GLOBAL_IGNORE_FILENAME = ".viopi_ignore_global"                                                                   
 REPO_IGNORE_FILENAME = ".viopi_ignore"                                                                            
                                                                                                                     
+# Parsed ignore files keyed by path: (st_mtime_ns, lines). Lines are kept as a                                    
+# tuple in file order because later gitignore patterns override earlier ones.                                     
+_IGNORE_FILE_CACHE: dict[str, tuple[int, tuple[str, ...]]] = {}                                                   
+                                                                                                                    
+# Resolved directory -> nearest enclosing git root (None if there is none).                                       
+_GIT_ROOT_CACHE: dict[str, str | None] = {}                                                                       
+                                                                                                                    
 # ANSI color codes for pretty output (can be disabled by stripping)                                               
 ANSI = {                                                                                                          
     "cyan": "\033[36m",                                                                                           
@@ -48,26 +59,183 @@ class IgnorePattern:
                                                                                                                     
 def _find_git_root(start_path: Path) -> Path | None:                                                              
     """                                                                                                           
-    Traverse upward from start_path to locate a directory containing a .git folder.                               
-    Returns the Path if found, else None.                                                                         
+    Traverse upward from start_path, which must already be resolved, to locate                                    
+    a directory containing a .git folder. Returns the Path if found, else None.                                   
+                                                                                                                    
+    Results are memoized for every directory visited on the way up, so a later                                    
+    lookup stops at the first ancestor whose answer is already known. The walk                                    
+    works on plain strings, so no Path objects are built per level.                                               
+    """                                                                                                           
+    current_dir = str(start_path)                                                                                 
+    visited: list[str] = []                                                                                       
+    git_root: str | None = None                                                                                   
+    while True:                                                                                                   
+        if current_dir in _GIT_ROOT_CACHE:                                                                        
+            git_root = _GIT_ROOT_CACHE[current_dir]                                                               
+            break                                                                                                 
+        visited.append(current_dir)                                                                               
+        if os.path.isdir(os.path.join(current_dir, ".git")):                                                      
+            git_root = current_dir                                                                                
+            break                                                                                                 
+        # Stop after checking the filesystem root as well                                                         
+        parent_dir = os.path.dirname(current_dir)                                                                 
+        if parent_dir == current_dir:                                                                             
+            break                                                                                                 
+        current_dir = parent_dir                                                                                  
+                                                                                                                    
+    # Every directory between start_path and the answer shares the same root.                                     
+    for directory in visited:                                                                                     
+        _GIT_ROOT_CACHE[directory] = git_root                                                                     
+    return Path(git_root) if git_root is not None else None                                                       
+                                                                                                                    
+                                                                                                                    
+def _read_ignore_file(file_path: Path) -> tuple[str, ...] | None:                                                 
+    """                                                                                                           
+    Return the raw lines of an ignore file, or None if there is no such file.                                     
+                                                                                                                    
+    A single stat both checks that the file exists and validates the cached                                       
+    lines, which are only re-read when the file's mtime changed.                                                  
+    """                                                                                                           
+    try:                                                                                                          
+        st = file_path.stat()                                                                                     
+    except OSError:                                                                                               
+        return None                                                                                               
+    if not stat.S_ISREG(st.st_mode):                                                                              
+        return None                                                                                               
+                                                                                                                    
+    key = str(file_path)                                                                                          
+    cached = _IGNORE_FILE_CACHE.get(key)                                                                          
+    if cached is not None and cached[0] == st.st_mtime_ns:                                                        
+        return cached[1]                                                                                          
+                                                                                                                    
+    with open(file_path, "r", encoding="utf-8") as f:                                                             
+        lines = tuple(f.read().splitlines())                                                                      
+    _IGNORE_FILE_CACHE[key] = (st.st_mtime_ns, lines)                                                             
+    return lines                                                                                                  
+                                                                                                                    
+                                                                                                                    
+def _normalize_path(file: str) -> str:                                                                            
+    """Normalize a relative path the way pathspec does before matching."""                                        
+    norm = os.fspath(file)                                                                                        
+    if os.sep != "/":                                                                                             
+        norm = norm.replace(os.sep, "/")                                                                          
+    if norm.startswith("/"):                                                                                      
+        norm = norm[1:]                                                                                           
+    elif norm.startswith("./"):                                                                                   
+        norm = norm[2:]                                                                                           
+    return norm                                                                                                   
+                                                                                                                    
+                                                                                                                    
+def _combine_pattern_regexes(patterns) -> list[tuple[bool, re.Pattern]] | None:                                   
+    """                                                                                                           
+    Fold pattern regexes into one anchored alternation per run of consecutive                                     
+    patterns with the same polarity (ignore vs. negated "!" re-include).                                          
+                                                                                                                    
+    The last matching pattern decides, so the runs are returned last-first:                                       
+    the first run that matches a path gives its verdict. Without negations                                        
+    this is a single regex. Returns None if a pattern cannot be folded, so                                        
+    the caller keeps pathspec's ordered evaluation.                                                               
+    """                                                                                                           
+    runs: list[tuple[bool, list[str]]] = []                                                                       
+    for pattern in patterns:                                                                                      
+        if pattern.include is None:  # Blank line or comment                                                      
+            continue                                                                                              
+        regex = getattr(pattern, "regex", None)                                                                   
+        if regex is None or not regex.pattern.startswith("^"):                                                    
+            return None                                                                                           
+        # Named groups may repeat across patterns; they are not needed here.                                      
+        source = re.sub(r"\(\?P<\w+>", "(?:", regex.pattern)                                                      
+        if runs and runs[-1][0] == pattern.include:                                                               
+            runs[-1][1].append(source)                                                                            
+        else:                                                                                                     
+            runs.append((pattern.include, [source]))                                                              
+    return [                                                                                                      
+        (include, re.compile("|".join(f"(?:{source})" for source in sources)))                                    
+        for include, sources in reversed(runs)                                                                    
+    ]                                                                                                             
+                                                                                                                    
+                                                                                                                    
+def _literal_names(lines: Iterable[str]) -> tuple[frozenset[str], frozenset[str]]:                                
+    """                                                                                                           
+    Collect patterns that are a bare name without wildcards or inner slashes.                                     
+    Returns (names matching directories, names matching files); a trailing                                        
+    "/" restricts a name to directories.                                                                          
+    """                                                                                                           
+    dir_names: set[str] = set()                                                                                   
+    file_names: set[str] = set()                                                                                  
+    for line in lines:                                                                                            
+        if line != line.strip() or line.startswith(("#", "!", "/")):                                              
+            continue                                                                                              
+        name = line[:-1] if line.endswith("/") else line                                                          
+        if not name or any(c in name for c in "*?[\\/"):                                                          
+            continue                                                                                              
+        dir_names.add(name)                                                                                       
+        if name == line:                                                                                          
+            file_names.add(name)                                                                                  
+    return frozenset(dir_names), frozenset(file_names)                                                            
+                                                                                                                    
+                                                                                                                    
+class IgnoreMatcher:                                                                                              
+    """                                                                                                           
+    Compiled ignore matcher exposing the PathSpec matching interface.                                             
+                                                                                                                    
+    Pattern regexes are combined into one alternation per run of same-polarity                                    
+    patterns, so each path costs one regex call per run (a single call when                                       
+    nothing is negated) instead of one per pattern. Patterns that cannot be                                       
+    combined fall back to the PathSpec.                                                                           
     """                                                                                                           
-    current_dir = start_path.resolve()                                                                            
-    while current_dir.parent != current_dir:                                                                      
-        if (current_dir / ".git").is_dir():                                                                       
-            return current_dir                                                                                    
-        current_dir = current_dir.parent                                                                          
-    # Check the filesystem root as well                                                                           
-    if (current_dir / ".git").is_dir():                                                                           
-        return current_dir                                                                                        
-    return None                                                                                                   
+                                                                                                                    
+    def __init__(self, spec: pathspec.PathSpec, lines: Iterable[str] = ()):                                       
+        self.spec = spec                                                                                          
+        self.patterns = spec.patterns                                                                             
+        self._runs = _combine_pattern_regexes(spec.patterns)                                                      
+        # Plain names (".git/", "node_modules", ".DS_Store") match an entry by                                    
+        # basename alone, so the walker can rule those out with a set lookup                                      
+        # before any regex runs. Only safe when nothing can re-include them.                                      
+        self.literal_dir_names: frozenset[str] = frozenset()                                                      
+        self.literal_file_names: frozenset[str] = frozenset()                                                     
+        if self._runs is not None and len(self._runs) == 1 and self._runs[0][0]:                                  
+            self.literal_dir_names, self.literal_file_names = _literal_names(lines)                               
+                                                                                                                    
+    def _match_normalized(self, norm: str) -> bool:                                                               
+        for include, regex in self._runs:                                                                         
+            if regex.match(norm) is not None:                                                                     
+                return include                                                                                    
+        return False                                                                                              
+                                                                                                                    
+    def match_file(self, file: str) -> bool:                                                                      
+        if self._runs is None:                                                                                    
+            return self.spec.match_file(file)                                                                     
+        return self._match_normalized(_normalize_path(file))                                                      
+                                                                                                                    
+    def match_files(self, files: Iterable[str]) -> Iterator[str]:                                                 
+        if self._runs is None:                                                                                    
+            return self.spec.match_files(files)                                                                   
+        if len(self._runs) == 1 and self._runs[0][0]:                                                             
+            match = self._runs[0][1].match                                                                        
+            return (f for f in files if match(_normalize_path(f)) is not None)                                    
+        return (f for f in files if self._match_normalized(_normalize_path(f)))                                   
+                                                                                                                    
+                                                                                                                    
+@lru_cache(maxsize=32)                                                                                            
+def compile_spec(patterns: tuple[str, ...]) -> IgnoreMatcher:                                                     
+    """                                                                                                           
+    Compile gitwildmatch patterns into an IgnoreMatcher, memoized on the exact                                    
+    pattern sequence so identical pattern lists share one compiled matcher.                                       
+    """                                                                                                           
+    # pathspec is imported on first use; it is comparatively slow to import and                                   
+    # runs that exit early (--help, --version) never need it.                                                     
+    import pathspec                                                                                               
+                                                                                                                    
+    return IgnoreMatcher(pathspec.PathSpec.from_lines("gitwildmatch", patterns), patterns)                        
                                                                                                                     
                                                                                                                     
 def get_ignore_config(                                                                                            
     start_dir: str,                                                                                               
     return_annotated: bool = False                                                                                
-) -> tuple[pathspec.PathSpec, Path] | tuple[pathspec.PathSpec, Path, list[IgnorePattern]]:                        
+) -> tuple[IgnoreMatcher, Path] | tuple[IgnoreMatcher, Path, list[IgnorePattern]]:                                
     """                                                                                                           
-    Build the combined ignore PathSpec plus the root path for path matching.                                      
+    Build the combined ignore matcher plus the root path for path matching.                                       
                                                                                                                     
     Args:                                                                                                         
         start_dir: Directory where operation starts.                                                              
@@ -76,49 +244,56 @@ def get_ignore_config(
     Returns:                                                                                                      
         A tuple of (spec, root) or (spec, root, annotated_list) if return_annotated is True.                      
     """                                                                                                           
-    start_path = Path(start_dir).resolve()                                                                        
+    # Resolved once here; the git root lookup relies on it being canonical.                                       
+    start_path = Path(os.path.realpath(start_dir))                                                                
                                                                                                                     
     # Anchor root: git repo root if present, otherwise start_dir                                                  
     project_root = _find_git_root(start_path) or start_path                                                       
                                                                                                                     
-    annotated: list[IgnorePattern] = []                                                                           
+    # Pattern lines grouped by source, in precedence order. The cached line                                       
+    # tuples are shared as-is; per-line IgnorePattern objects are only built                                      
+    # when the annotated listing is requested.                                                                    
+    sources: list[tuple[str, tuple[str, ...]]] = []                                                               
                                                                                                                     
     # 1. Defaults                                                                                                 
-    for p in DEFAULT_IGNORE_PATTERNS:                                                                             
-        annotated.append(IgnorePattern(p, "default"))                                                             
+    sources.append(("default", tuple(DEFAULT_IGNORE_PATTERNS)))                                                   
                                                                                                                     
     # 2. Global ignore (~/.viopi_ignore_global)                                                                   
     global_ignore_path = Path.home() / GLOBAL_IGNORE_FILENAME                                                     
-    if global_ignore_path.is_file():                                                                              
-        with open(global_ignore_path, "r", encoding="utf-8") as f:                                                
-            for line in f.read().splitlines():                                                                    
-                annotated.append(IgnorePattern(line, str(global_ignore_path)))                                    
+    global_lines = _read_ignore_file(global_ignore_path)                                                          
+    if global_lines is not None:                                                                                  
+        sources.append((str(global_ignore_path), global_lines))                                                   
                                                                                                                     
     # 3. Collect project-level .viopi_ignore files from project_root down to start_path                           
     # We walk upward from start_path to project_root, storing any ignore files encountered.                       
     path_iterator = start_path                                                                                    
-    ignore_files_to_read: list[Path] = []                                                                         
+    ignore_files_to_read: list[tuple[Path, tuple[str, ...]]] = []                                                 
     while True:                                                                                                   
         ignore_file = path_iterator / REPO_IGNORE_FILENAME                                                        
-        if ignore_file.is_file():                                                                                 
-            ignore_files_to_read.append(ignore_file)                                                              
+        lines = _read_ignore_file(ignore_file)                                                                    
+        if lines is not None:                                                                                     
+            ignore_files_to_read.append((ignore_file, lines))                                                     
         if path_iterator == project_root or path_iterator.parent == path_iterator:                                
             break                                                                                                 
         path_iterator = path_iterator.parent                                                                      
                                                                                                                     
     # We want parent-most first for correct precedence, so reverse the collected list.                            
-    for file_path in reversed(ignore_files_to_read):                                                              
-        with open(file_path, "r", encoding="utf-8") as f:                                                         
-            for line in f.read().splitlines():                                                                    
-                annotated.append(IgnorePattern(line, str(file_path)))                                             
+    for file_path, lines in reversed(ignore_files_to_read):                                                       
+        sources.append((str(file_path), lines))                                                                   
                                                                                                                     
     # Combine all patterns (raw; may include blanks/comments)                                                     
-    all_patterns = [ip.pattern for ip in annotated]                                                               
+    all_patterns = tuple(line for _, lines in sources for line in lines)                                          
                                                                                                                     
-    # Build PathSpec (gitwildmatch semantics handles comments and empty lines)                                    
-    spec = pathspec.PathSpec.from_lines("gitwildmatch", all_patterns)                                             
+    # The same pattern often appears in several sources (e.g. a default                                           
+    # repeated in a .viopi_ignore). The last matching pattern decides, so only                                    
+    # the last copy of a repeated line can matter; earlier ones are dropped.                                      
+    unique_patterns = tuple(reversed(dict.fromkeys(reversed(all_patterns))))                                      
+                                                                                                                    
+    # Build the matcher (gitwildmatch semantics handles comments and empty lines)                                 
+    spec = compile_spec(unique_patterns)                                                                          
                                                                                                                     
     if return_annotated:                                                                                          
+        annotated = [IgnorePattern(line, source) for source, lines in sources for line in lines]                  
         # We need to cast here because the function signature has an overload-like union.                         
         # The caller expects a 3-tuple when return_annotated is True.                                             
         return spec, project_root, annotated                                                                      
@@ -196,6 +371,10 @@ def get_formatted_ignore_listing(start_dir: str, color: bool = True) -> str:
                                                                                                                     
 # If run directly: show listing for current directory                                                             
 if __name__ == "__main__":                                                                                        
+    # Only this debug entry point parses arguments; keep argparse off the                                         
+    # import path of the viopi command.                                                                           
+    import argparse                                                                                               
+                                                                                                                    
     parser = argparse.ArgumentParser(                                                                             
         description="Show combined viopi ignore patterns (debug helper)."                                         
     )                                                                                                             
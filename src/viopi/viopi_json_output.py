@@ -2,10 +2,36 @@
 # Handles the generation of JSON formatted output for Viopi.
 
 import json
+from typing import Tuple
 
-def generate_json_output(stats: dict, file_data_list: list) -> str:
+# orjson is an optional, much faster encoder; the stdlib is the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps_utf8(data) -> bytes:
+    """Serializes `data` as JSON indented by two spaces, as UTF-8 bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # orjson rejects strings that aren't valid UTF-8, such as file names
+            # the OS handed back with surrogate escapes.
+            pass
+    # Written as UTF-8 like orjson, so both encoders give identical bytes. Lone
+    # surrogates can't be encoded and become \udcXX escapes, which are still
+    # valid JSON for the same string.
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8', 'backslashreplace')
+
+def generate_json_output_with_payload_size(stats: dict, file_data_list: list) -> Tuple[bytes, int]:
     """
-    Formats the collected project data into a JSON string.
+    Formats the collected project data as pretty-printed JSON, as UTF-8 bytes
+    ready to write, with the size of the JSON recorded as
+    stats["payload_size_bytes"].
+
+    The data is serialized only once: the size is measured on the output
+    without that field, which is then spliced into the "stats" object.
 
     Args:
         stats: A dictionary containing statistics (total files, lines, chars).
@@ -13,11 +39,12 @@ def generate_json_output(stats: dict, file_data_list: list) -> str:
                         represents a file with its path and content.
 
     Returns:
-        A pretty-printed JSON string representing the project data.
+        A (json_bytes, payload_size_bytes) tuple.
     """
-    output_data = {
-        "stats": stats,
-        "files": file_data_list
-    }
-    # Use indent for pretty-printing the JSON
-    return json.dumps(output_data, indent=2)
\ No newline at end of file
+    output = _dumps_utf8({"stats": stats, "files": file_data_list})
+    payload_size = len(output)
+    # "stats" is serialized first and only holds numbers, so the first brace
+    # closed at this indentation is the end of the stats object.
+    end_of_stats = output.index(b"\n  }")
+    size_field = b',\n    "payload_size_bytes": %d' % payload_size
+    return b"".join((output[:end_of_stats], size_field, output[end_of_stats:])), payload_size
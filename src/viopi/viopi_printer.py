@@ -16,41 +16,40 @@ def configure(silent: bool = False):
     global _SILENT_MODE
     _SILENT_MODE = silent
 
-def _print_stats(stats: dict):
-    """Prints the formatted statistics block to stderr."""
+def _print_stats(stats: dict, message: str = ""):
+    """
+    Prints an optional status message and the formatted statistics block to
+    stderr. The block is written in one call rather than line by line.
+    """
     if _SILENT_MODE:
         return
     payload_size_str = viopi_utils.format_bytes(stats.get("payload_size_bytes", 0))
 
-    print("-" * 20, file=sys.stderr)
-    print("Viopi Run Statistics:", file=sys.stderr)
-    print(f"  - Files Processed:  {stats.get('total_files', 0)}", file=sys.stderr)
-    print(f"  - Files Ignored:    {stats.get('files_ignored', 0)}", file=sys.stderr)
-    print(f"  - Total Lines:      {stats.get('total_lines', 0)}", file=sys.stderr)
-    print(f"  - Total Characters: {stats.get('total_characters', 0)}", file=sys.stderr)
+    lines = [message] if message else []
+    lines.append("-" * 20)
+    lines.append("Viopi Run Statistics:")
+    lines.append(f"  - Files Processed:  {stats.get('total_files', 0)}")
+    lines.append(f"  - Files Ignored:    {stats.get('files_ignored', 0)}")
+    lines.append(f"  - Total Lines:      {stats.get('total_lines', 0)}")
+    lines.append(f"  - Total Characters: {stats.get('total_characters', 0)}")
     if stats.get("total_chars_saved_minify", 0) > 0:
         saved_str = viopi_utils.format_bytes(stats.get("total_chars_saved_minify", 0))
-        print(f"  - Minification Saved: {saved_str}", file=sys.stderr)
-    print(f"  - Payload Size:     {payload_size_str}", file=sys.stderr)
-    print("-" * 20, file=sys.stderr)
+        lines.append(f"  - Minification Saved: {saved_str}")
+    lines.append(f"  - Payload Size:     {payload_size_str}")
+    lines.append("-" * 20)
+    sys.stderr.write("\n".join(lines) + "\n")
 
 def print_success_copy(stats: dict):
     """Prints the success message and stats for clipboard copy to stderr."""
-    if not _SILENT_MODE:
-        print("Viopi output copied to clipboard.", file=sys.stderr)
-    _print_stats(stats)
+    _print_stats(stats, "Viopi output copied to clipboard.")
 
 def print_success_file(stats: dict, filename: str):
     """Prints the success message and stats for file save to stderr."""
-    if not _SILENT_MODE:
-        print(f"Output saved to {filename}", file=sys.stderr)
-    _print_stats(stats)
+    _print_stats(stats, f"Output saved to {filename}")
 
 def print_success_append(stats: dict, filename: str):
     """Prints the success message and stats for file append to stderr."""
-    if not _SILENT_MODE:
-        print(f"Output appended to {filename}", file=sys.stderr)
-    _print_stats(stats)
+    _print_stats(stats, f"Output appended to {filename}")
 
 def print_info(message: str):
     """Prints a standard informational message to stderr."""
@@ -1,7 +1,16 @@
+import mmap
 import os
+import stat
+import threading
 from pathlib import Path
-from typing import List, Tuple
-import pathspec
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from . import viopi_ignorer
+
+T = TypeVar("T")
+
+# File reads release the GIL, so a thread pool overlaps their syscall latency.
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
 def format_bytes(size_bytes: int) -> str:
     """Formats a size in bytes into a human-readable string (KiB, MiB, etc.)."""
@@ -16,105 +25,509 @@ def format_bytes(size_bytes: int) -> str:
     size_gib = size_mib / 1024
     return f"{size_gib:.1f} GiB"
 
-def is_binary_file(file_path: str, chunk_size: int = 1024) -> bool:
-    """Heuristically determines if a file is binary by checking for null bytes."""
-    try:
-        with open(file_path, 'rb') as f:
-            chunk = f.read(chunk_size)
-        return b'\0' in chunk
-    except IOError:
+def utf8_size(text: str) -> int:
+    """
+    Returns the UTF-8 encoded size of `text` in bytes. ASCII-only strings
+    (the common case for source code) are sized without encoding a copy.
+    """
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-8'))
+
+# Leading bytes of common binary formats. Some of them (PDF, gzip) need not
+# contain a NUL byte early on, so the signature check also catches files the
+# NUL scan alone would miss.
+_BINARY_SIGNATURES = (
+    b'\x7fELF',            # ELF executables / shared objects
+    b'\x89PNG',            # PNG
+    b'\xff\xd8\xff',        # JPEG
+    b'GIF87a', b'GIF89a',  # GIF
+    b'%PDF',               # PDF
+    b'PK\x03\x04',          # ZIP, JAR, wheels, Office documents
+    b'\x1f\x8b',            # gzip
+    b'\xca\xfe\xba\xbe',    # Java class files / Mach-O fat binaries
+    b'\x00asm',            # WebAssembly
+)
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+# Flags for reading a file through a raw descriptor; O_BINARY only exists
+# (and matters) on Windows.
+_OPEN_READ_FLAGS = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+
+# Extensions whose binary/text status is known without reading the file.
+# Files without an extension are not listed: executables often have none.
+TEXT_EXTENSIONS = frozenset({
+    ".py", ".pyi", ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".md", ".rst", ".txt",
+    ".toml", ".yaml", ".yml", ".json", ".ini", ".cfg", ".c", ".h", ".cpp", ".hpp", ".cs",
+    ".rs", ".go", ".java", ".kt", ".kts", ".swift", ".m", ".rb", ".php", ".pl", ".lua",
+    ".sh", ".bash", ".zsh", ".ps1", ".css", ".scss", ".html", ".xml", ".sql", ".r",
+    ".lock", ".csv", ".tsv", ".mdx", ".vue", ".svelte", ".dart", ".scala", ".ex", ".exs",
+    ".hs", ".clj", ".tf", ".proto", ".graphql", ".gradle", ".properties", ".cmake",
+    ".bat", ".svg",
+})
+# Extensionless (or dot-prefixed) names that are conventionally text.
+TEXT_FILENAMES = frozenset({
+    "Makefile", "Dockerfile", "LICENSE", "README", "CHANGELOG", "Gemfile", "Rakefile",
+    "Procfile", "Vagrantfile", ".gitignore", ".gitattributes", ".dockerignore",
+    ".editorconfig", ".env", ".viopi_ignore", ".viopi_ignore_global",
+})
+BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".webp", ".pdf", ".zip", ".tar", ".gz",
+    ".bz2", ".xz", ".7z", ".jar", ".class", ".so", ".dylib", ".dll", ".exe", ".o", ".a",
+    ".pyc", ".wasm", ".woff", ".woff2", ".ttf", ".otf", ".mp3", ".mp4", ".mov",
+})
+
+def classify_by_extension(file_path: str) -> Optional[bool]:
+    """Returns True/False if the extension alone says binary/text, else None."""
+    if os.path.basename(file_path) in TEXT_FILENAMES:
+        return False
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in TEXT_EXTENSIONS:
         return False
+    if ext in BINARY_EXTENSIONS:
+        return True
+    return None
+
+def is_binary_chunk(chunk: bytes) -> bool:
+    """Heuristically determines if a leading chunk of file data is binary."""
+    # Prefix lookups settle the common cases before scanning the chunk.
+    if chunk.startswith(_UTF8_BOM):
+        return False
+    if chunk.startswith(_BINARY_SIGNATURES):
+        return True
+    return b'\0' in chunk
+
+def sniff_file(file_path: str, chunk_size: int = 1024, size: Optional[int] = None) -> Tuple[int, bool]:
+    """
+    Returns (size_bytes, is_binary) for a file using a single open.
+    The size comes from fstat on the open descriptor and the same read
+    feeds the binary check, so no second stat or open is needed.
+    Files with a well-known extension are only stat'ed, never opened, and
+    not even stat'ed when the caller already knows their `size`.
+    """
+    known = classify_by_extension(file_path)
+    if known is not None:
+        return (os.stat(file_path).st_size if size is None else size), known
+    # A raw descriptor skips the file object's own fstat/isatty probing and
+    # its read buffer; only `chunk_size` bytes are ever needed.
+    fd = os.open(file_path, _OPEN_READ_FLAGS)
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return 0, False
+        return size, is_binary_chunk(os.read(fd, chunk_size))
+    finally:
+        os.close(fd)
+
+# Per-thread scratch buffer that small files are read into, so the hot read
+# loop doesn't allocate a fresh bytes object for every file. Larger files are
+# read directly so a worker thread never pins a big buffer.
+_READ_BUFFER_MAX_BYTES = 1024 * 1024
+_read_buffers = threading.local()
+
+def _get_read_buffer(min_size: int) -> bytearray:
+    buf = getattr(_read_buffers, "buf", None)
+    if buf is None or len(buf) < min_size:
+        buf = bytearray(max(min_size, 64 * 1024))
+        _read_buffers.buf = buf
+    return buf
+
+def _decode_text(data) -> str:
+    content = str(data, 'utf-8', 'ignore')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+def _fill_buffer(readinto: Callable[[memoryview], int], read_rest: Callable[[], bytes], size_hint: int) -> str:
+    """Reads a file of roughly `size_hint` bytes via `readinto` and decodes it."""
+    # One spare byte lets a single read confirm EOF.
+    with memoryview(_get_read_buffer(size_hint + 1)) as view:
+        filled = 0
+        while filled < len(view):
+            got = readinto(view[filled:])
+            if not got:
+                return _decode_text(view[:filled])
+            filled += got
+        # The file grew past the buffer since it was sized; read the rest.
+        return _decode_text(bytes(view) + read_rest())
+
+def _read_large_file(fd: int) -> str:
+    """
+    Decodes a large file straight from a read-only mapping, so its bytes are
+    never copied into an intermediate bytes object before decoding.
+    """
+    try:
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            return _decode_text(mapped)
+    except (OSError, ValueError):
+        # Not mappable, e.g. the file was emptied since it was sized.
+        with open(fd, 'rb', closefd=False) as f:
+            return _decode_text(f.read())
+
+def read_text_file(file_path: str, size_hint: Optional[int] = None) -> str:
+    """
+    Reads a file as UTF-8 text, silently dropping undecodable bytes.
+    The file is read in binary mode and decoded in one pass, then newlines
+    are normalized the same way text mode would.
+    """
+    if not hasattr(os, "readv"):
+        # Windows has no readv; go through a raw file object instead.
+        with open(file_path, 'rb', buffering=0) as f:
+            if size_hint is None:
+                size_hint = os.fstat(f.fileno()).st_size
+            if size_hint >= _READ_BUFFER_MAX_BYTES:
+                return _read_large_file(f.fileno())
+            return _fill_buffer(f.readinto, f.read, size_hint)
+
+    # Working on the raw descriptor keeps a file down to open, fstat, the
+    # reads and close; a file object would add its own fstat on open.
+    fd = os.open(file_path, _OPEN_READ_FLAGS)
+    try:
+        if size_hint is None:
+            size_hint = os.fstat(fd).st_size
+        if size_hint >= _READ_BUFFER_MAX_BYTES:
+            return _read_large_file(fd)
+        return _fill_buffer(
+            lambda view: os.readv(fd, (view,)),
+            lambda: _read_to_end(fd),
+            size_hint,
+        )
+    finally:
+        os.close(fd)
+
+def _read_to_end(fd: int) -> bytes:
+    """Reads whatever is left on a descriptor."""
+    parts = []
+    while True:
+        chunk = os.read(fd, _READ_BUFFER_MAX_BYTES)
+        if not chunk:
+            return b"".join(parts)
+        parts.append(chunk)
+
+def count_lines(content: str) -> int:
+    """
+    Counts '\\n'-terminated lines, plus an unterminated last line, without
+    building a list of lines. Unlike str.splitlines(), other separators such
+    as '\\f', '\\v', '\\x85' or '\\u2028' do not start a new line.
+    """
+    if not content:
+        return 0
+    return content.count('\n') + (not content.endswith('\n'))
+
+def _call_capturing(func: Callable[[str], T], file_path: str) -> Tuple[Optional[T], Optional[OSError]]:
+    try:
+        return func(file_path), None
+    except OSError as e:
+        return None, e
+
+def _call_batch(func: Callable[[str], T], file_paths: List[str]) -> List[Tuple[Optional[T], Optional[OSError]]]:
+    return [_call_capturing(func, file_path) for file_path in file_paths]
+
+# Upper bound on paths handed to a worker per task. Batching amortizes the
+# per-task cost of submitting a future, which rivals a small file's read.
+MAX_BATCH_SIZE = 8
+
+def iter_map_files(func: Callable[[str], T], file_paths: List[str],
+                   window: Optional[int] = None) -> Iterator[Tuple[Optional[T], Optional[OSError]]]:
+    """
+    Lazily applies `func` to every path on a thread pool.
+    Yields (result, error) pairs in the same order as `file_paths`; exactly one
+    of the two is None, so callers can report failures per file. At most
+    about `window` calls are in flight or buffered, which bounds memory when
+    the results are file contents that get consumed one by one.
+    """
+    if len(file_paths) < 2:
+        for file_path in file_paths:
+            yield _call_capturing(func, file_path)
+        return
+    # Imported here so --help / --version and other early exits skip them.
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    window = window or MAX_IO_WORKERS * 4
+    # Batch only once every worker has a few tasks' worth of paths, so small
+    # runs still spread across the pool.
+    batch_size = max(1, min(MAX_BATCH_SIZE, len(file_paths) // (MAX_IO_WORKERS * 4)))
+    max_pending = max(1, window // batch_size)
+    with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+        pending = deque()
+        for start in range(0, len(file_paths), batch_size):
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+            batch = file_paths[start:start + batch_size]
+            pending.append(executor.submit(_call_batch, func, batch))
+        while pending:
+            yield from pending.popleft().result()
+
+def map_files(func: Callable[[str], T], file_paths: List[str]) -> List[Tuple[Optional[T], Optional[OSError]]]:
+    """Applies `func` to every path on a thread pool; see iter_map_files."""
+    return list(iter_map_files(func, file_paths, window=len(file_paths)))
 
 def get_file_list(
     target_dir: str,
     patterns: List[str],
     follow_links: bool,
-    ignore_spec: pathspec.PathSpec,
+    ignore_spec: 'viopi_ignorer.IgnoreMatcher',
     ignore_root: Path
-) -> Tuple[List[Tuple[str, str, bool]], List[Tuple[str, str, bool]]]:
+) -> Tuple[List[Tuple[str, str, bool, Optional[int]]], List[Tuple[str, str, bool, Optional[int]]]]:
     """
     Walks the target directory to get a list of files, filtering by patterns and ignore rules.
 
-    Returns two lists of tuples: (physical_path, logical_path, is_symlink)
+    Returns two lists of tuples: (physical_path, logical_path, is_symlink, size_bytes)
     - The first list is for files to process.
     - The second list is for files that were ignored.
+    size_bytes is None for ignored files and for files that could not be stat'ed.
     """
     files_to_process = []
     ignored_files = []
-    target_path = Path(target_dir)
 
-    pattern_spec = pathspec.PathSpec.from_lines('gitwildmatch', patterns) if patterns else None
+    pattern_spec = viopi_ignorer.compile_spec(tuple(patterns)) if patterns else None
+    literal_dir_names = ignore_spec.literal_dir_names
+    literal_file_names = ignore_spec.literal_file_names
+
+    # Relative paths are carried along as plain strings while descending, so the
+    # hot loop only does string concatenation instead of building Path objects.
+    # '' stands for the directory itself.
+    target_rel_to_ignore_root = str(Path(target_dir).relative_to(ignore_root))
+    if target_rel_to_ignore_root == ".":
+        target_rel_to_ignore_root = ""
 
-    for root, dirs, files in os.walk(target_dir, followlinks=follow_links, topdown=True):
-        root_path = Path(root)
+    # Explicit stack of directories to scan as (path, path relative to ignore_root,
+    # path relative to target_dir). os.scandir hands back DirEntry objects whose
+    # type information comes straight from readdir, so classifying entries and
+    # detecting symlinks needs no extra stat calls.
+    dirs_to_scan = [(target_dir, target_rel_to_ignore_root, "")]
+    while dirs_to_scan:
+        root, ignore_rel_root, logical_rel_root = dirs_to_scan.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = list(it)
+        except OSError:
+            # Unreadable directories are skipped, as os.walk does.
+            continue
+
+        dir_entries = []
+        file_entries = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            (dir_entries if is_dir else file_entries).append(entry)
 
         # The path for matching against ignore rules MUST be relative to the ignore_root.
         # This is the key fix for the user's issue.
-        paths_for_ignore_check = [root_path.relative_to(ignore_root) / d for d in dirs]
-        paths_for_ignore_check.extend(root_path.relative_to(ignore_root) / f for f in files)
-
-        # pathspec can match directories, so we filter them from the `dirs` list in-place.
-        # This prevents os.walk from descending into ignored directories.
-        ignored_paths = ignore_spec.match_files(paths_for_ignore_check)
-        ignored_dir_names = {p.name for p in ignored_paths if (ignore_root / p).is_dir()}
-        dirs[:] = [d for d in dirs if d not in ignored_dir_names]
-
-        for file_name in files:
-            physical_path = root_path / file_name
-            is_symlink = physical_path.is_symlink()
-            
-            # This path is used for the ignore check. It's relative to the project root.
-            path_for_ignore = physical_path.relative_to(ignore_root)
-            
+        ignore_prefix = ignore_rel_root + os.sep if ignore_rel_root else ""
+        logical_prefix = logical_rel_root + os.sep if logical_rel_root else ""
+        # Directories are matched with a trailing separator, as git does, so
+        # directory-only patterns like "build/" prune the directory itself.
+        # Entries named by a plain-name pattern are ignored without matching.
+        dir_rel_paths = {
+            ignore_prefix + e.name + os.sep: e
+            for e in dir_entries if e.name not in literal_dir_names
+        }
+        file_rel_paths = {
+            e.name: ignore_prefix + e.name
+            for e in file_entries if e.name not in literal_file_names
+        }
+
+        # Match every entry of this directory against the compiled spec in one
+        # batch; the result is reused below so no path is matched twice.
+        ignored_paths = set(ignore_spec.match_files([*dir_rel_paths, *file_rel_paths.values()]))
+
+        # Ignored directories are never pushed onto the stack, so their
+        # subtrees are not read at all. Symlinked directories are only
+        # descended into when following links.
+        for rel, entry in dir_rel_paths.items():
+            if rel in ignored_paths:
+                continue
+            if not follow_links and entry.is_symlink():
+                continue
+            dirs_to_scan.append((entry.path, rel[:-1], logical_prefix + entry.name))
+
+        for entry in file_entries:
             # This path is displayed to the user. It's relative to the command's target directory.
-            logical_path = physical_path.relative_to(target_path)
-            
-            file_tuple = (str(physical_path), str(logical_path), is_symlink)
+            logical_path = logical_prefix + entry.name
+
+            is_symlink = entry.is_symlink()
 
             # --- Filtering Logic ---
-            # 1. Check against .viopi_ignore rules.
-            if ignore_spec.match_file(str(path_for_ignore)):
-                ignored_files.append(file_tuple)
+            # 1. Check against .viopi_ignore rules (path relative to the project root).
+            rel_path = file_rel_paths.get(entry.name)
+            if rel_path is None or rel_path in ignored_paths:
+                ignored_files.append((entry.path, logical_path, is_symlink, None))
                 continue
 
             # 2. If user-provided patterns exist, check against them.
-            if pattern_spec and not pattern_spec.match_file(str(logical_path)):
-                ignored_files.append(file_tuple)
+            if pattern_spec and not pattern_spec.match_file(logical_path):
+                ignored_files.append((entry.path, logical_path, is_symlink, None))
                 continue
-                
-            files_to_process.append(file_tuple)
+
+            # Size the file here so callers need no second stat (the huge-file
+            # check uses it). entry.stat() follows symlinks, like Path.stat().
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                size = None
+            files_to_process.append((entry.path, logical_path, is_symlink, size))
 
     files_to_process.sort(key=lambda x: x[1])
     ignored_files.sort(key=lambda x: x[1])
     
     return files_to_process, ignored_files
 
+def get_git_file_list(
+    target_dir: str,
+    patterns: List[str],
+    ignore_spec: 'viopi_ignorer.IgnoreMatcher',
+    ignore_root: Path
+) -> Optional[Tuple[List[Tuple[str, str, bool, Optional[int]]], List[Tuple[str, str, bool, Optional[int]]]]]:
+    """
+    Lists files with `git ls-files` instead of walking the target directory.
+
+    Git answers from its index, so large trees are listed without reading every
+    directory. Tracked and untracked files are included, minus anything
+    excluded by .gitignore; .viopi_ignore rules and patterns still apply on
+    top. Symlinked directories are not followed.
+
+    Returns the same lists as get_file_list, or None when git is unavailable
+    or target_dir is not inside a work tree.
+    """
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            ["git", "-C", target_dir, "ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    files_to_process = []
+    ignored_files = []
+
+    pattern_spec = viopi_ignorer.compile_spec(tuple(patterns)) if patterns else None
+
+    target_rel_to_ignore_root = str(Path(target_dir).relative_to(ignore_root))
+    ignore_prefix = "" if target_rel_to_ignore_root == "." else target_rel_to_ignore_root + os.sep
+
+    # Paths are relative to target_dir and always use '/'. A path can be listed
+    # twice (e.g. unmerged entries), hence the dict.
+    logical_paths = {
+        os.path.normpath(os.fsdecode(raw)): None
+        for raw in result.stdout.split(b"\0") if raw
+    }
+    # The walker never enters an ignored directory, so nothing below one is
+    # listed or counted as ignored. Apply the same pruning to git's flat list:
+    # every parent directory is matched once, with a trailing separator.
+    parent_dirs = set()
+    for logical_path in logical_paths:
+        parent = os.path.dirname(logical_path)
+        while parent and parent not in parent_dirs:
+            parent_dirs.add(parent)
+            parent = os.path.dirname(parent)
+    ignored_dirs = {
+        rel[len(ignore_prefix):-1]
+        for rel in ignore_spec.match_files([ignore_prefix + d + os.sep for d in parent_dirs])
+    }
+    # Sorted, a directory comes before everything inside it.
+    pruned_dirs = set()
+    for d in sorted(parent_dirs):
+        if d in ignored_dirs or os.path.dirname(d) in pruned_dirs:
+            pruned_dirs.add(d)
+
+    rel_paths = {
+        logical_path: ignore_prefix + logical_path
+        for logical_path in logical_paths
+        if os.path.dirname(logical_path) not in pruned_dirs
+    }
+    ignored_paths = set(ignore_spec.match_files(rel_paths.values()))
+
+    for logical_path, rel_path in rel_paths.items():
+        physical_path = os.path.join(target_dir, logical_path)
+        try:
+            st = os.lstat(physical_path)
+        except OSError:
+            # Tracked but deleted from the work tree.
+            continue
+        if stat.S_ISDIR(st.st_mode):
+            # Submodules are listed as a single directory entry.
+            continue
+        is_symlink = stat.S_ISLNK(st.st_mode)
+
+        if rel_path in ignored_paths:
+            ignored_files.append((physical_path, logical_path, is_symlink, None))
+            continue
+        if pattern_spec and not pattern_spec.match_file(logical_path):
+            ignored_files.append((physical_path, logical_path, is_symlink, None))
+            continue
+
+        # Symlinks are sized by their target, like the walker does.
+        if is_symlink:
+            try:
+                st = os.stat(physical_path)
+            except OSError:
+                st = None
+            if st is not None and stat.S_ISDIR(st.st_mode):
+                continue
+        size = st.st_size if st is not None else None
+        files_to_process.append((physical_path, logical_path, is_symlink, size))
+
+    files_to_process.sort(key=lambda x: x[1])
+    ignored_files.sort(key=lambda x: x[1])
+
+    return files_to_process, ignored_files
+
 def generate_tree_output(items: List[Tuple[str, bool, bool]]) -> str:
     """
     Generates a file tree string from a list of paths and their status.
     'items' is a list of (path_str, is_symlink, is_ignored).
+
+    The tree is built in-process from the paths the walker already collected,
+    so no second directory traversal is needed.
     """
+    # Nested dicts for directories; files map to their display suffix.
     tree_dict = {}
     for path_str, is_symlink, is_ignored in items:
-        # Attach metadata to the path for later lookup
-        path_with_meta = f"{path_str}"
-        if is_ignored:
-            path_with_meta += " [ignored]"
+        suffix = ""
         if is_symlink:
-            path_with_meta += " -> [symbolic link]"
-            
-        parts = Path(path_str).parts
+            suffix += " -> [symbolic link]"
+        if is_ignored:
+            suffix += " [ignored]"
+
+        # Logical paths come from the walker joined with os.sep, so a plain
+        # split replaces building a Path per file.
+        *dir_parts, file_name = path_str.split(os.sep)
         current_level = tree_dict
-        for part in parts:
+        for part in dir_parts:
             current_level = current_level.setdefault(part, {})
-    
-    # This is a simplified tree generator that lists the files.
+        current_level[file_name] = suffix
+
     lines = ["--- File Tree ---"]
-    for logical_path, is_symlink, is_ignored in sorted(items):
-        line = "src/viopi/" + logical_path
-        if is_symlink:
-            line += " -> [symbolic link]"
-        if is_ignored:
-            line += " [ignored]"
-        lines.append(line)
-    return "\n".join(lines)
\ No newline at end of file
+    _render_tree(tree_dict, "", lines)
+    return "\n".join(lines)
+
+def _render_tree(node: dict, prefix: str, lines: List[str]) -> None:
+    """Appends `tree`-style lines for the children of `node` to `lines`."""
+    # Explicit stack of (prefix, name, child, is_last), so deep trees neither
+    # pay a call per directory nor hit the recursion limit. Children are
+    # pushed in reverse so they pop in sorted order.
+    stack = []
+
+    def push_children(node: dict, prefix: str) -> None:
+        names = sorted(node)
+        last = len(names) - 1
+        for index in range(last, -1, -1):
+            name = names[index]
+            stack.append((prefix, name, node[name], index == last))
+
+    push_children(node, prefix)
+    while stack:
+        prefix, name, child, is_last = stack.pop()
+        connector = "└── " if is_last else "├── "
+        if isinstance(child, dict):
+            lines.append(f"{prefix}{connector}{name}/")
+            push_children(child, prefix + ("    " if is_last else "│   "))
+        else:
+            lines.append(f"{prefix}{connector}{name}{child}")
@@ -1,26 +1,77 @@
 # viopi_version.py
 # Handles version detection and display for the Viopi project.
 
+import hashlib
+import json
+import os
 import sys
 from pathlib import Path
-import importlib.metadata
 
 # --- TOML Parsing (for development fallback) ---
-try:
-    import tomllib
-except ImportError:
+def _import_tomllib():
+    """Imports a TOML parser on demand; only the dev fallback needs one."""
     try:
-        import tomli as tomllib
+        import tomllib
     except ImportError:
-        tomllib = None
+        try:
+            import tomli as tomllib
+        except ImportError:
+            return None
+    return tomllib
+
+# Parsed versions keyed by (pyproject path, st_mtime_ns, st_size). A key only
+# matches while the file is unchanged, so editing pyproject.toml invalidates it.
+# Values are (content digest, version).
+_VERSION_CACHE = {}
+# Versions keyed by a digest of the pyproject.toml bytes, so a file that was
+# touched but not changed is still not re-parsed.
+_TOML_CACHE = {}
+_VERSION_CACHE_LOADED = False
+
+def _get_cache_file() -> Path:
+    """Returns the on-disk location of the version cache (XDG cache dir)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "viopi" / "version.json"
+
+def _load_version_cache():
+    """Populates the in-memory cache from disk once per process."""
+    global _VERSION_CACHE_LOADED
+    if _VERSION_CACHE_LOADED:
+        return
+    _VERSION_CACHE_LOADED = True
+    try:
+        with open(_get_cache_file(), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        for path, mtime_ns, size, digest, version in entries:
+            _VERSION_CACHE[(path, mtime_ns, size)] = (digest, version)
+            _TOML_CACHE[digest] = version
+    except (OSError, ValueError, TypeError):
+        # A missing or corrupt cache just means we parse the TOML again.
+        pass
+
+def _save_version_cache():
+    """Persists the in-memory cache so later invocations can skip parsing."""
+    cache_file = _get_cache_file()
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        entries = [[*key, *value] for key, value in _VERSION_CACHE.items()]
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+    except OSError:
+        # Caching is best-effort; never fail a run because of it.
+        pass
 
 def get_project_version() -> str:
     """Retrieves the project version from package metadata or pyproject.toml."""
+    # Deferred: importlib.metadata is only needed when a version is requested.
+    import importlib.metadata
+
     try:
         # First, try the standard way for an installed package
         return importlib.metadata.version("viopi")
     except importlib.metadata.PackageNotFoundError:
         # Fallback for development: search for pyproject.toml
+        tomllib = _import_tomllib()
         if tomllib is None:
             return "0.0.0-dev (tomli not found)"
         try:
@@ -28,11 +79,33 @@ def get_project_version() -> str:
             current_dir = Path(__file__).resolve().parent
             while current_dir != current_dir.parent: # Stop at the filesystem root
                 pyproject_path = current_dir / 'pyproject.toml'
-                if pyproject_path.exists():
-                    with open(pyproject_path, "rb") as f:
-                        data = tomllib.load(f)
-                    return data.get("project", {}).get("version", "0.0.0-dev (version missing)")
-                current_dir = current_dir.parent
+                try:
+                    st = pyproject_path.stat()
+                except FileNotFoundError:
+                    current_dir = current_dir.parent
+                    continue
+
+                # Reuse the previously parsed version if the file is unchanged
+                _load_version_cache()
+                key = (str(pyproject_path), st.st_mtime_ns, st.st_size)
+                if key in _VERSION_CACHE:
+                    return _VERSION_CACHE[key][1]
+
+                # Read the file once; the same bytes are hashed and parsed.
+                raw = pyproject_path.read_bytes()
+                digest = hashlib.blake2b(raw, digest_size=8).hexdigest()
+                version = _TOML_CACHE.get(digest)
+                if version is None:
+                    data = tomllib.loads(raw.decode("utf-8"))
+                    version = data.get("project", {}).get("version", "0.0.0-dev (version missing)")
+                    _TOML_CACHE[digest] = version
+
+                # Drop stale entries for this file before recording the new one
+                for stale in [k for k in _VERSION_CACHE if k[0] == key[0]]:
+                    del _VERSION_CACHE[stale]
+                _VERSION_CACHE[key] = (digest, version)
+                _save_version_cache()
+                return version
             return "0.0.0-dev (pyproject.toml not found)"
         except Exception:
             return "0.0.0-dev (pyproject parse error)"
@@ -0,0 +1,57 @@
+import json
+import unittest
+from unittest import mock
+
+from viopi import viopi_json_output
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SAMPLE_STATS = {"total_files": 2, "total_lines": 3, "total_characters": 42}
+SAMPLE_FILES = [
+    {"path": "café/naïve.py", "content": "print('héllo 😀 中文')\n"},
+    {"path": "ctrl.txt", "content": "\x00\x1f\x7f\b\f\n\r\t \u2028\u2029 \"\\/ \ufeff"},
+    {"path": "empty.txt", "content": ""},
+]
+
+
+def _encode(stats, files, use_orjson):
+    with mock.patch.object(viopi_json_output, "orjson", orjson if use_orjson else None):
+        return viopi_json_output.generate_json_output_with_payload_size(dict(stats), files)
+
+
+@unittest.skipIf(orjson is None, "orjson is not installed")
+class EncoderParityTest(unittest.TestCase):
+    def test_orjson_and_stdlib_emit_identical_bytes(self):
+        self.assertEqual(
+            _encode(SAMPLE_STATS, SAMPLE_FILES, use_orjson=True),
+            _encode(SAMPLE_STATS, SAMPLE_FILES, use_orjson=False),
+        )
+
+    def test_identical_bytes_without_files(self):
+        self.assertEqual(
+            _encode(SAMPLE_STATS, [], use_orjson=True),
+            _encode(SAMPLE_STATS, [], use_orjson=False),
+        )
+
+
+class PayloadTest(unittest.TestCase):
+    def test_payload_size_is_spliced_into_stats(self):
+        output, payload_size = _encode(SAMPLE_STATS, SAMPLE_FILES, use_orjson=False)
+        data = json.loads(output.decode("utf-8"))
+        self.assertEqual(data["stats"]["payload_size_bytes"], payload_size)
+        self.assertEqual(data["files"], SAMPLE_FILES)
+
+    def test_surrogate_escaped_path_stays_valid_json(self):
+        # os.scandir returns undecodable file names with surrogate escapes.
+        files = [{"path": "caf\udce9.txt", "content": "hi\n"}]
+        for use_orjson in (True, False):
+            output, _ = _encode(SAMPLE_STATS, files, use_orjson=use_orjson)
+            data = json.loads(output.decode("utf-8"))
+            self.assertEqual(data["files"], files)
+
+
+if __name__ == "__main__":
+    unittest.main()